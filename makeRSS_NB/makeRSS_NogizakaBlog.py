@@ -1,93 +1,48 @@
 import os
 import re
+import sys
 import requests
-import xml.etree.ElementTree as ET
-from xml.dom import minidom
-import csv
-from collections import deque
-from urllib.parse import urlparse, parse_qs
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from makerss.emitter import write_feeds
+from makerss.enrich import enrich_feed_items, parse_body
+from makerss.itemstore import append_feed_items, link_ref, load_feed_refs, read_feed_items
+from makerss.registry import feeds_for, output_path
+from makerss.runner import run_feeds
 
 MAX_XML_ITEMS = 300  # XMLに保持する最大アイテム数
 FIELDNAMES = ['title', 'link', 'pubDate']
+EXTRACTOR = 'makeRSS_NB.makeRSS_NogizakaBlog'  # feeds.json の extractor
 
-def extract_article_id(url):
-    """URLから記事IDを抽出（imaパラメータを無視）"""
-    # /diary/detail/104021 の 104021 を取得
-    match = re.search(r'/diary/detail/(\d+)', url)
-    if match:
-        return match.group(1)
-    return url  # マッチしない場合はURL全体を返す
-
-def load_existing_ids(csv_file):
-    """CSVから記事IDのみ読み込む（重複チェック用・軽量）"""
-    existing_ids = set()
-    if os.path.exists(csv_file):
-        with open(csv_file, 'r', encoding='utf-8-sig', newline='') as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                article_id = extract_article_id(row['link'])
-                existing_ids.add(article_id)
-    return existing_ids
-
-def append_csv(csv_file, items):
-    """新規アイテムをCSV末尾に追記（高速）"""
-    if not items:
-        return
-    file_exists = os.path.exists(csv_file) and os.path.getsize(csv_file) > 0
-    with open(csv_file, 'a', encoding='utf-8-sig', newline='') as f:
-        writer = csv.DictWriter(f, fieldnames=FIELDNAMES)
-        if not file_exists:
-            writer.writeheader()
-        writer.writerows(items)
-
-def read_last_n_lines(csv_file, n):
-    """CSVの末尾N行を読み込む（最新N件取得用）"""
-    if not os.path.exists(csv_file):
-        return []
-    
-    with open(csv_file, 'r', encoding='utf-8-sig', newline='') as f:
-        reader = csv.DictReader(f)
-        last_n = deque(reader, maxlen=n)
-    
-    return list(reversed(last_n))
-
-url_and_xmls = [
-    {
-        'url': 'https://www.nogizaka46.com/s/n46/diary/MEMBER/list?page=0&ct=55387&cd=MEMBER',
-        'xml': 'feed_Blog_YumikiNao.xml',
-        'csv': 'feed_Blog_YumikiNao.csv',
-        'include_phrase': [],
-    },
-    {
-        'url': 'https://www.nogizaka46.com/s/n46/diary/MEMBER/list?page=0&ct=48010&cd=MEMBER',
-        'xml': 'feed_Blog_KanagawaSaya.xml',
-        'csv': 'feed_Blog_KanagawaSaya.csv',
-        'include_phrase': [],
-    },
-]
-
-for url_and_xml in url_and_xmls:
-    url = url_and_xml['url']
-    xml_file_name = url_and_xml['xml']
-    csv_file_name = url_and_xml['csv']
-    include_phrase = url_and_xml.get('include_phrase', [])
-
-    # 既存記事IDのみ読み込み（軽量）
-    existing_ids = load_existing_ids(csv_file_name)
-    print(f"{xml_file_name}: 既存記事ID数 {len(existing_ids)}")
+# 一覧ページから記事のリンク、タイトル、日付を抜き出す正規表現
+LINK_PATTERN = re.compile(r'<a class="bl--card js-pos a--op hv--thumb" href="([^"]+)">')
+TITLE_PATTERN = re.compile(r'<p class="bl--card__ttl">([^<]+)</p>')
+DATE_PATTERN = re.compile(r'<p class="bl--card__date">([^<]+)</p>')
+BODY_MARKER = '<div class="bd--edit">'  # 個別ページの本文開始タグ
+
+def parse_detail(html_content, link):
+    """個別ページから概要と最初の画像を取り出す"""
+    return parse_body(html_content, BODY_MARKER, link)
+
+def run_feed(feed):
+    """1フィード分の取得・CSV追記・XML出力"""
+    url = feed['source']
+    xml_file_name = output_path(feed, 'xml')
+    include_phrase = feed['filters'].get('include_words', [])
+    name = feed['name']
+
+    # 既存参照のみ読み込み（軽量、キーは記事IDで正規化済み）
+    existing_refs = load_feed_refs(feed, FIELDNAMES)
+    print(f"{name}: 既存参照数 {len(existing_refs)}")
 
     print(f"Fetching URL: {url}")
     response = requests.get(url)
     html_content = response.text
 
     # 記事のリンク、タイトル、日付を取得
-    link_pattern = re.compile(r'<a class="bl--card js-pos a--op hv--thumb" href="([^"]+)">')
-    title_pattern = re.compile(r'<p class="bl--card__ttl">([^<]+)</p>')
-    date_pattern = re.compile(r'<p class="bl--card__date">([^<]+)</p>')
-
-    links = link_pattern.findall(html_content)
-    titles = title_pattern.findall(html_content)
-    dates = date_pattern.findall(html_content)
+    links = LINK_PATTERN.findall(html_content)
+    titles = TITLE_PATTERN.findall(html_content)
+    dates = DATE_PATTERN.findall(html_content)
 
     print(f"Found {len(links)} links, {len(titles)} titles, {len(dates)} dates")
 
@@ -95,48 +50,43 @@ for url_and_xml in url_and_xmls:
     for link, title, date in zip(links, titles, dates):
         if not include_phrase or any(phrase in title for phrase in include_phrase):
             full_link = f"https://www.nogizaka46.com{link}"
-            article_id = extract_article_id(full_link)
-            if article_id in existing_ids:
+            ref = link_ref(full_link)
+            if ref in existing_refs:
                 continue
             new_items.append({
                 'title': title,
                 'link': full_link,
                 'pubDate': date
             })
-            existing_ids.add(article_id)
+            existing_refs.add(ref)
 
-    print(f"{xml_file_name}: 新規アイテム数 {len(new_items)}")
+    print(f"{name}: 新規アイテム数 {len(new_items)}")
 
     # 新規がなければスキップ
     if not new_items:
-        print(f"{xml_file_name}: 更新スキップ")
-        continue
+        print(f"{name}: 更新スキップ")
+        return
 
-    # 新規アイテムをCSV末尾に追記（高速）
-    append_csv(csv_file_name, new_items)
-    print(f"{xml_file_name}: CSV追記完了")
+    # 新規アイテムをCSV末尾に追記（高速、store指定のフィードは本体を共有ストアへ入れ参照だけ追記）
+    append_feed_items(feed, new_items, FIELDNAMES)
+    print(f"{name}: CSV追記完了")
 
     # XMLは最新300件（CSV末尾300行を逆順で取得）
-    xml_items = read_last_n_lines(csv_file_name, MAX_XML_ITEMS)
-
-    # XML作成
-    root = ET.Element("rss", version="2.0")
-    channel = ET.SubElement(root, "channel")
-    ET.SubElement(channel, "title").text = "Latest Blogs"
-    ET.SubElement(channel, "description").text = "Nogizaka46 Latest Blog Posts"
-
-    for item_data in xml_items:
-        item = ET.SubElement(channel, "item")
-        ET.SubElement(item, "title").text = item_data['title']
-        ET.SubElement(item, "link").text = item_data['link']
-        ET.SubElement(item, "pubDate").text = item_data['pubDate']
-
-    # XMLファイルに保存
-    xml_string = ET.tostring(root, 'utf-8')
-    reparsed = minidom.parseString(xml_string)
-    pretty_xml = reparsed.toprettyxml(indent="  ")
-    with open(xml_file_name, 'w', encoding='utf-8') as f:
-        f.write(pretty_xml)
-    print(f"{xml_file_name}: XML保存完了 {len(xml_items)} items")
-
-print("Done!")
+    xml_items = read_feed_items(feed, FIELDNAMES, MAX_XML_ITEMS)
+
+    # 個別ページから概要・画像を付ける（取得するのは新規アイテムだけ、取得済みはキャッシュを使う）
+    if feed.get('enrich'):
+        xml_items = enrich_feed_items(feed, new_items, xml_items, parse_detail)
+
+    # RSS / Atom / JSON Feed をまとめて書き出し
+    write_feeds(xml_file_name, feed['channel'], xml_items)
+    print(f"{name}: XML作成完了 {len(xml_items)} items")
+
+def main():
+    # フィードごとに実行し、失敗したフィードの出力だけ取り消して残りは反映する
+    if run_feeds(feeds_for(EXTRACTOR), run_feed):
+        sys.exit(1)
+    print("Done!")
+
+if __name__ == "__main__":
+    main()
@@ -1,55 +1,27 @@
 import requests
 import re
-import xml.etree.ElementTree as ET
-from xml.dom import minidom
 import os
-import csv
-from collections import deque
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from makerss.emitter import write_feeds
+from makerss.itemstore import append_feed_items, link_ref, load_feed_refs, read_feed_items
+from makerss.registry import feeds_for, output_path
+from makerss.runner import run_feeds
 
 MAX_XML_ITEMS = 300  # XMLに保持する最大アイテム数
 FIELDNAMES = ['title', 'link', 'description', 'pubDate']
-
-def load_existing_links(csv_file):
-    """CSVからリンクのみ読み込む（重複チェック用・軽量）"""
-    existing_links = set()
-    if os.path.exists(csv_file):
-        with open(csv_file, 'r', encoding='utf-8-sig', newline='') as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                existing_links.add(row['link'])
-    return existing_links
-
-def append_csv(csv_file, items):
-    """新規アイテムをCSV末尾に追記（高速）"""
-    if not items:
-        return
-    file_exists = os.path.exists(csv_file) and os.path.getsize(csv_file) > 0
-    with open(csv_file, 'a', encoding='utf-8-sig', newline='') as f:
-        writer = csv.DictWriter(f, fieldnames=FIELDNAMES)
-        if not file_exists:
-            writer.writeheader()
-        writer.writerows(items)
-
-def read_last_n_lines(csv_file, n):
-    """CSVの末尾N行を読み込む（最新N件取得用）"""
-    if not os.path.exists(csv_file):
-        return []
-    
-    with open(csv_file, 'r', encoding='utf-8-sig', newline='') as f:
-        reader = csv.DictReader(f)
-        last_n = deque(reader, maxlen=n)
-    
-    return list(reversed(last_n))
+EXTRACTOR = 'makeRSS_PRTIMES.makeRSS_PRTIMES'  # feeds.json の extractor
 
 def fetch_and_update_feed(feed):
-    url = feed["url"]
-    includeWords = feed["includeWords"]
-    output_file = feed["output_file"]
-    csv_file = output_file.replace('.xml', '.csv')
+    url = feed["source"]
+    includeWords = feed["filters"]["include_words"]
+    output_file = output_path(feed, 'xml')
+    name = feed["name"]
     
-    # 既存リンクのみ読み込み（軽量）
-    existing_links = load_existing_links(csv_file)
-    print(f"{output_file}: 既存リンク数 {len(existing_links)}")
+    # 既存参照のみ読み込み（軽量）
+    existing_refs = load_feed_refs(feed, FIELDNAMES)
+    print(f"{name}: 既存参照数 {len(existing_refs)}")
     
     # 新しいフィードを取得
     response = requests.get(url)
@@ -68,8 +40,9 @@ def fetch_and_update_feed(feed):
         title = title_match.group(1)
         link = link_match.group(1)
         
-        # 既存のリンクならスキップ
-        if link in existing_links:
+        # 既存の参照ならスキップ
+        ref = link_ref(link)
+        if ref in existing_refs:
             continue
         
         description_match = re.search(r"<description>([\s\S]*?)<\/description>", item)
@@ -89,61 +62,32 @@ def fetch_and_update_feed(feed):
                 'pubDate': date
             }
             new_items.append(new_item)
-            existing_links.add(link)
+            existing_refs.add(ref)
     
-    print(f"{output_file}: 新規 {len(new_items)} items")
+    print(f"{name}: 新規 {len(new_items)} items")
     
     # 新規がなければスキップ
     if not new_items:
-        print(f"{output_file}: 更新スキップ")
+        print(f"{name}: 更新スキップ")
         return
 
-    # 新規アイテムをCSV末尾に追記（高速）
-    append_csv(csv_file, new_items)
+    # 新規アイテムをCSV末尾に追記（高速、store指定のフィードは本体を共有ストアへ入れ参照だけ追記）
+    append_feed_items(feed, new_items, FIELDNAMES)
     
     # XMLは最新300件（CSV末尾300行を逆順で取得）
-    xml_items = read_last_n_lines(csv_file, MAX_XML_ITEMS)
-    
-    # XMLを生成
-    root = ET.Element("rss", version="2.0")
-    channel = ET.SubElement(root, "channel")
-    ET.SubElement(channel, "title").text = f"{output_file}の特定のキーワードを含むRSS"
-    ET.SubElement(channel, "description").text = f"{url}から特定のキーワードを含む記事を提供します。"
-    ET.SubElement(channel, "link").text = url
+    xml_items = read_feed_items(feed, FIELDNAMES, MAX_XML_ITEMS)
     
-    for item_data in xml_items:
-        item_elem = ET.SubElement(channel, "item")
-        ET.SubElement(item_elem, "title").text = item_data['title']
-        ET.SubElement(item_elem, "link").text = item_data['link']
-        ET.SubElement(item_elem, "description").text = item_data['description']
-        ET.SubElement(item_elem, "pubDate").text = item_data['pubDate']
+    # RSS / Atom / JSON Feed をまとめて書き出し（制御文字の除去はエミッタ側で行う）
+    write_feeds(output_file, feed["channel"], xml_items)
     
-    xml_str = ET.tostring(root)
-    xml_str = re.sub(u'[\x00-\x08\x0B\x0C\x0E-\x1F\x7F]', '', xml_str.decode()).encode()
-    xml_pretty_str = minidom.parseString(xml_str).toprettyxml(indent="  ")
-    xml_pretty_str = os.linesep.join([s for s in xml_pretty_str.splitlines() if s.strip()])
+    print(f"{name}: XML作成完了 {len(xml_items)} items")
 
-    with open(output_file, "w", encoding='utf-8') as f:
-        f.write(xml_pretty_str)
-    
-    print(f"{output_file}: XML保存完了 {len(xml_items)} items")
+run_feed = fetch_and_update_feed  # makerss.runner から呼ばれる共通名
 
 def main():
-    feeds = [
-        {
-            "url": "https://prtimes.jp/index.rdf",
-            "includeWords": ["生成AI", "ChatGPT", "DX", "自動化", "RPA", "ノーコード", "ローコード"],
-            "output_file": "makeRSS_PRTIMES_AI.xml"
-        },
-        {
-            "url": "https://prtimes.jp/index.rdf",
-            "includeWords": ["BPaaS"],
-            "output_file": "makeRSS_PRTIMES_BPaaS.xml"
-        },
-    ]
-    
-    for feed in feeds:
-        fetch_and_update_feed(feed)
+    # フィードごとに実行し、失敗したフィードの出力だけ取り消して残りは反映する
+    if run_feeds(feeds_for(EXTRACTOR), fetch_and_update_feed):
+        sys.exit(1)
 
 if __name__ == "__main__":
     main()
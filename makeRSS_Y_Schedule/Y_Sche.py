@@ -1,72 +1,44 @@
 import os
 import re
-from bs4 import BeautifulSoup
-from pyppeteer import launch
-from xml.etree.ElementTree import Element, SubElement, tostring
+import sys
 from datetime import datetime, timedelta
-import xml.dom.minidom
-import xml.etree.ElementTree as ET
 import asyncio
 from html import unescape as html_unescape
-from urllib.parse import urlparse, parse_qs
 import traceback
-import csv
-from collections import deque
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from makerss.emitter import write_feeds
+from makerss.itemstore import append_feed_items, item_key, item_ref, load_feed_refs, read_feed_items
+from makerss.lazy import timed_import
+from makerss.registry import feeds_for, output_path
+from makerss.runner import run_feeds
 
 MAX_XML_ITEMS = 300  # XMLに保持する最大アイテム数
 FIELDNAMES = ['pubDate', 'title', 'link', 'category', 'start_time']
+EXTRACTOR = 'makeRSS_Y_Schedule.Y_Sche'  # feeds.json の extractor
 
-def load_existing_keys(csv_file):
-    """CSVからキーのみ読み込む（重複チェック用・軽量）"""
-    existing_keys = set()
-    if os.path.exists(csv_file):
-        with open(csv_file, 'r', encoding='utf-8-sig', newline='') as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                key = (row['pubDate'], extract_url_part(row['link']))
-                existing_keys.add(key)
-    return existing_keys
-
-def append_csv(csv_file, items):
-    """新規アイテムをCSV末尾に追記（高速）"""
-    if not items:
-        return
-    file_exists = os.path.exists(csv_file) and os.path.getsize(csv_file) > 0
-    with open(csv_file, 'a', encoding='utf-8-sig', newline='') as f:
-        writer = csv.DictWriter(f, fieldnames=FIELDNAMES)
-        if not file_exists:
-            writer.writeheader()
-        writer.writerows(items)
-
-def read_last_n_lines(csv_file, n):
+def schedule_key(row):
+    """同じリンクが毎年出る（誕生日など）ので日付も含めてキーにする"""
+    return f"{item_key(row['link'])}#{row['pubDate']}"
+
+def read_last_n_lines(feed, n):
     """CSVの末尾N行を読み込む（最新N件取得用）"""
-    if not os.path.exists(csv_file):
-        return []
-    
-    with open(csv_file, 'r', encoding='utf-8-sig', newline='') as f:
-        reader = csv.DictReader(f)
-        last_n = deque(reader, maxlen=n)
+    items = read_feed_items(feed, FIELDNAMES, n)
     
     # 日付降順でソートして返す（スケジュールは日付順が重要）
-    items = list(last_n)
     items.sort(key=lambda x: x.get('pubDate', ''), reverse=True)
     return items
 
-def extract_url_part(url):
-    """URLが可変する部分を除外してURLを確認する"""
-    parsed_url = urlparse(url)
-    path = parsed_url.path.split("/")[-1]
-    query = parse_qs(parsed_url.query)
-    unique_part = f"{path}_{query.get('pri1', [''])[0]}_{query.get('wd00', [''])[0]}_{query.get('wd01', [''])[0]}_{query.get('wd02', [''])[0]}"
-    return unique_part
-
-async def main():
-    existing_file = 'Y_Sche.xml'
-    csv_file = 'Y_Sche.csv'
+async def fetch_and_update_feed(feed):
+    existing_file = output_path(feed, 'xml')
     
-    # 既存キーのみ読み込み（軽量）
-    existing_keys = load_existing_keys(csv_file)
-    print(f"既存キー数: {len(existing_keys)}")
+    # 既存参照のみ読み込み（軽量、キーは可変クエリを除いたリンクと日付）
+    existing_refs = load_feed_refs(feed, FIELDNAMES, schedule_key)
+    print(f"既存参照数: {len(existing_refs)}")
+
+    # ブラウザ・HTMLパーサは重いので、このフィードを実行するときだけimportする
+    launch = timed_import('pyppeteer').launch
+    BeautifulSoup = timed_import('bs4').BeautifulSoup
 
     # 新規情報を保存するリスト
     new_schedules = []
@@ -89,14 +61,14 @@ async def main():
                 '--disable-gpu'
             ],
             defaultViewport=None,
-            userDataDir='./user_data',
+            userDataDir=os.path.join(os.path.dirname(os.path.abspath(__file__)), 'user_data'),
             logLevel='INFO'
         )
         print(f"Chromium launched successfully")
 
         while current_date <= end_date:
             yyyymm = current_date.strftime('%Y%m')
-            url = f"https://www.nogizaka46.com/s/n46/media/list?dy={yyyymm}&members={{%22member%22:[%2255387%22]}}"
+            url = feed['source'].format(yyyymm=yyyymm, member=feed['params']['member'])
             print(f"Fetching URL: {url}")
 
             page = await browser.newPage()
@@ -136,10 +108,10 @@ async def main():
                         start_time_tag = link.find('p', class_='m--scone__start')
                         start_time = start_time_tag.text if start_time_tag else ''
 
-                        extracted_url = extract_url_part(schedule_url)
+                        ref = item_ref(schedule_key({'link': schedule_url, 'pubDate': date}))
                         try:
                             datetime.strptime(date, "%Y/%m/%d")
-                            if (date, extracted_url) not in existing_keys:
+                            if ref not in existing_refs:
                                 new_item = {
                                     'pubDate': date,
                                     'title': title,
@@ -148,7 +120,7 @@ async def main():
                                     'start_time': start_time
                                 }
                                 new_schedules.append(new_item)
-                                existing_keys.add((date, extracted_url))
+                                existing_refs.add(ref)
                                 print(f"新規情報を追加: {date}, {title}")
                         except ValueError:
                             print(f"日付フォーマットエラー: {date}")
@@ -182,34 +154,27 @@ async def main():
         print("新規スケジュールなし、更新スキップ")
         return
 
-    # 新規アイテムをCSV末尾に追記（高速）
-    append_csv(csv_file, new_schedules)
+    # 新規アイテムをCSV末尾に追記（高速、store指定のフィードは本体を共有ストアへ入れ参照だけ追記）
+    append_feed_items(feed, new_schedules, FIELDNAMES, schedule_key)
     print(f"CSV追記完了: {len(new_schedules)} items added")
 
     # XMLは最新300件（CSV末尾から取得し日付降順ソート）
-    xml_items = read_last_n_lines(csv_file, MAX_XML_ITEMS)
-
-    # RSSフィードを生成
-    rss = Element("rss", version="2.0")
-    channel = SubElement(rss, "channel")
-    SubElement(channel, "title").text = "弓木奈於のスケジュール"
-    SubElement(channel, "description").text = ""
-    SubElement(channel, "link").text = ""
-    
-    for item_data in xml_items:
-        item = SubElement(channel, "item")
-        SubElement(item, "title").text = item_data['title']
-        SubElement(item, "link").text = item_data['link']
-        SubElement(item, "pubDate").text = item_data['pubDate']
-        SubElement(item, "category").text = item_data['category']
-        SubElement(item, "start_time").text = item_data['start_time']
-
-    xml_str = xml.dom.minidom.parseString(tostring(rss)).toprettyxml(indent="   ")
-
-    with open(existing_file, 'w', encoding='utf-8') as f:
-        f.write(xml_str)
+    xml_items = read_last_n_lines(feed, MAX_XML_ITEMS)
+
+    # RSS / Atom / JSON Feed をまとめて書き出し（開始時刻は非標準要素ではなくdescriptionに入れる）
+    feed_items = [dict(item_data, description=item_data['start_time']) for item_data in xml_items]
+    write_feeds(existing_file, feed['channel'], feed_items)
     
-    print(f"XML保存完了: {len(xml_items)} items (最大{MAX_XML_ITEMS}件)")
+    print(f"XML作成完了: {len(xml_items)} items (最大{MAX_XML_ITEMS}件)")
+
+def run_feed(feed):
+    """1フィード分の取得・CSV追記・XML出力"""
+    asyncio.run(fetch_and_update_feed(feed))
+
+def main():
+    # フィードごとに実行し、失敗したフィードの出力だけ取り消して残りは反映する
+    if run_feeds(feeds_for(EXTRACTOR), run_feed):
+        sys.exit(1)
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    main()
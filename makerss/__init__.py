@@ -0,0 +1 @@
+"""makeRSS 各スクリプトで共有する処理"""
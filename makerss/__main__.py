@@ -0,0 +1,6 @@
+import sys
+
+from makerss.lazy import timed_import
+
+# CLI自身のimport時間も --import-times に出るよう、timed_import 経由で読み込む
+sys.exit(timed_import('makerss.cli').main())
@@ -0,0 +1,34 @@
+"""個別ページから取った概要・画像の記事IDごとのキャッシュ（requests を使わないので merge からも読める）"""
+import json
+
+from makerss.transaction import read_text, stage
+
+
+def load_cache(cache_file):
+    """記事ID -> {description, enclosure}（取得に失敗した記事は {failures: 回数}）のキャッシュを読み込む"""
+    text = read_text(cache_file)
+    return json.loads(text) if text else {}
+
+
+def save_cache(cache_file, cache):
+    """キャッシュの書き込みを予約（キー順に並べてgitの差分を小さくする）"""
+    text = json.dumps(cache, ensure_ascii=False, indent=1, sort_keys=True) + '\n'
+    stage(cache_file, text.encode('utf-8'))
+
+
+def _rank(entry):
+    """取り込み時の優先順（取得成功で本文あり > 本文なし > 失敗回数の多い記録）"""
+    if 'failures' in entry:
+        return (0, entry['failures'])
+    return (1, bool(entry))
+
+
+def merge_cache(src_file, cache_file):
+    """別のワーカーが書いたキャッシュを取り込む（記事IDごとの和集合、取得成功を優先）"""
+    with open(src_file, 'r', encoding='utf-8') as f:
+        incoming = json.load(f)
+    cache = load_cache(cache_file)
+    for article_id, entry in incoming.items():
+        if article_id not in cache or _rank(entry) > _rank(cache[article_id]):
+            cache[article_id] = entry
+    save_cache(cache_file, cache)
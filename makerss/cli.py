@@ -0,0 +1,117 @@
+"""makeRSS の統合コマンドライン
+
+    python -m makerss list
+    python -m makerss run hinata_kosaka nogizaka_yumiki
+    python -m makerss run --shard 0/4 --import-times
+    python -m makerss merge _artifacts/outputs-0 _artifacts/outputs-1
+
+抽出モジュールや pyppeteer などの重い依存は実行するフィードの分だけimportする。
+"""
+import argparse
+import os
+import sys
+
+from makerss.article_cache import merge_cache
+from makerss.itemstore import STORE_DIR, merge_store
+from makerss.lazy import IMPORT_TIMES
+from makerss.registry import ROOT, load_registry, select_shard, shard_of
+from makerss.runner import parse_shard, run_feeds
+from makerss.transaction import commit_outputs, stage
+
+
+def select_feeds(parser, args):
+    """フィード名・シャード指定に従ってフィードを絞り込み、(フィード, index, count) を返す"""
+    feeds = load_registry()
+    if args.feeds:
+        unknown = set(args.feeds) - {feed['name'] for feed in feeds}
+        if unknown:
+            parser.error(f"未登録のフィード: {', '.join(sorted(unknown))}")
+        feeds = [feed for feed in feeds if feed['name'] in args.feeds]
+    index, count = args.shard or (0, 1)
+    return select_shard(feeds, index, count), index, count
+
+
+def print_import_times():
+    """初回importにかかった時間を長い順に表示する（python -m makerss ならCLI自身のimportも含む）"""
+    print("import時間:")
+    for name, seconds in sorted(IMPORT_TIMES.items(), key=lambda entry: entry[1], reverse=True):
+        print(f"  {name}: {seconds * 1000:.1f}ms")
+
+
+def cmd_list(parser, args):
+    feeds, _, count = select_feeds(parser, args)
+    for feed in feeds:
+        print(f"{feed['name']}\t{feed['extractor']}\tshard {shard_of(feed, count)}/{count}")
+    return 0
+
+
+def cmd_run(parser, args):
+    if not args.feeds and not args.all and args.shard is None:
+        parser.error("フィード名、--all または --shard を指定してください")
+    feeds, index, count = select_feeds(parser, args)
+    print(f"シャード {index}/{count}: {len(feeds)} feeds")
+
+    failed = run_feeds(feeds)
+    if args.import_times:
+        print_import_times()
+    if failed:
+        print(f"失敗したフィード: {', '.join(failed)}")
+        return 1
+    print("Done!")
+    return 0
+
+
+def cmd_merge(parser, args):
+    """シャードごとの出力をリポジトリに重ねる（items/ と個別ページキャッシュは上書きせず和集合にする）
+
+    どのファイルも stage() を通すので、内容が同じものは書かず、残りは commit_outputs() でまとめて置き換える。
+    """
+    store_name = os.path.basename(STORE_DIR)
+    cache_files = {feed['enrich']['cache'] for feed in load_registry() if feed.get('enrich')}
+    for src_root in args.dirs:
+        for directory, _, file_names in os.walk(src_root):
+            relative_dir = os.path.relpath(directory, src_root)
+            if relative_dir.split(os.sep)[0] == store_name:
+                continue
+            for file_name in sorted(file_names):
+                src = os.path.join(directory, file_name)
+                relative = os.path.normpath(os.path.join(relative_dir, file_name)).replace(os.sep, '/')
+                dst = os.path.join(ROOT, relative)
+                if relative in cache_files:
+                    merge_cache(src, dst)
+                else:
+                    with open(src, 'rb') as f:
+                        stage(dst, f.read())
+        if os.path.isdir(os.path.join(src_root, store_name)):
+            merge_store(os.path.join(src_root, store_name))
+        print(f"{src_root}: 取り込み完了")
+    commit_outputs()
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='makerss', description="feeds.json のフィードを実行する")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    list_parser = subparsers.add_parser('list', help="登録済みフィードとシャードを表示する")
+    list_parser.set_defaults(handler=cmd_list, parser=list_parser, feeds=[])
+
+    run_parser = subparsers.add_parser('run', help="フィードを実行する")
+    run_parser.add_argument('feeds', nargs='*', metavar='FEED', help="実行するフィード名（複数指定可）")
+    run_parser.add_argument('--all', action='store_true', help="全フィードを実行する")
+    run_parser.add_argument('--import-times', action='store_true', help="遅延importにかかった時間を表示する")
+    run_parser.set_defaults(handler=cmd_run, parser=run_parser)
+
+    merge_parser = subparsers.add_parser('merge', help="シャードごとの出力ディレクトリを取り込む")
+    merge_parser.add_argument('dirs', nargs='+', metavar='DIR', help="リポジトリルートと同じ構成の出力ディレクトリ")
+    merge_parser.set_defaults(handler=cmd_merge, parser=merge_parser)
+
+    for sub in (list_parser, run_parser):
+        sub.add_argument('--shard', type=parse_shard, help="K/N（N分割したうちK番目だけ対象にする）")
+
+    args = parser.parse_args(argv)
+    return args.handler(args.parser, args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
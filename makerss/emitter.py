@@ -0,0 +1,204 @@
+"""RSS 2.0 / Atom / JSON Feed とその .gz 版を1パスで書き出す共通エミッタ"""
+import gzip
+import json
+import mimetypes
+import os
+import re
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+from xml.sax.saxutils import escape, quoteattr
+
+from makerss.registry import ROOT
+from makerss.transaction import stage
+
+JST = timezone(timedelta(hours=9))  # 日付にタイムゾーンがない場合はJSTとみなす
+
+# 各サイトのpubDate表記（2025.12.31 20:31 / 2025/12/27 19:14 / 2026/03/27 / ISO 8601）
+DATE_FORMATS = [
+    '%Y-%m-%dT%H:%M:%S%z',
+    '%Y.%m.%d %H:%M',
+    '%Y/%m/%d %H:%M',
+    '%Y.%m.%d',
+    '%Y/%m/%d',
+]
+
+# XML 1.0で使えない制御文字
+INVALID_XML_CHARS = re.compile('[\x00-\x08\x0B\x0C\x0E-\x1F\x7F]')
+
+# 日付を解釈できないときのAtom updated（実行時刻を使うと毎回出力が変わるため固定値にする）
+FALLBACK_UPDATED = '1970-01-01T00:00:00+00:00'
+
+# AtomのフィードID（tag URI）。Atomファイルのリポジトリ内パスを後ろに付ける
+FEED_ID_PREFIX = 'tag:github.com,2024:haits812/makeRSS/'
+
+# 拡張子ごとの出力（RSSは元の .xml をそのまま使う）
+FORMATS = {
+    'rss': '.xml',
+    'atom': '.atom',
+    'json': '.json',
+}
+
+
+def parse_date(text):
+    """pubDate文字列をdatetimeに変換（解釈できない場合はNone）"""
+    text = (text or '').strip()
+    for fmt in DATE_FORMATS:
+        try:
+            parsed = datetime.strptime(text, fmt)
+        except ValueError:
+            continue
+        if parsed.tzinfo is None:
+            parsed = parsed.replace(tzinfo=JST)
+        return parsed
+    return None
+
+
+def output_paths(xml_file):
+    """RSSのファイル名から各フォーマットの出力パスを求める"""
+    base = xml_file[:-len('.xml')] if xml_file.endswith('.xml') else xml_file
+    paths = {}
+    for name, ext in FORMATS.items():
+        paths[name] = base + ext
+        paths[name + '.gz'] = base + ext + '.gz'
+    return paths
+
+
+def feed_id(xml_file):
+    """Atom出力のパスから変わらないフィードIDを作る（同じタイトルのフィードでも重ならない）"""
+    relative = os.path.relpath(output_paths(xml_file)['atom'], ROOT).replace(os.sep, '/')
+    return FEED_ID_PREFIX + relative
+
+
+def _clean(value):
+    return INVALID_XML_CHARS.sub('', value or '')
+
+
+def _prepare(item_data):
+    """1アイテム分のエスケープ・日付変換をまとめて行う（全フォーマットで使い回す）"""
+    fields = {key: _clean(item_data.get(key)) for key in ('title', 'link', 'description', 'category', 'pubDate', 'enclosure')}
+    published = parse_date(fields['pubDate'])
+    enclosure_type = (mimetypes.guess_type(fields['enclosure'])[0] or 'image/jpeg') if fields['enclosure'] else ''
+    return {
+        'raw': fields,
+        'enclosure_type': enclosure_type,
+        'xml': {key: escape(value) for key, value in fields.items()},
+        'date': published,
+        'published': published.isoformat() if published else None,
+    }
+
+
+def _rss_item(prepared):
+    x = prepared['xml']
+    lines = ['    <item>',
+             f"      <title>{x['title']}</title>",
+             f"      <link>{x['link']}</link>"]
+    if x['description']:
+        lines.append(f"      <description>{x['description']}</description>")
+    if x['category']:
+        lines.append(f"      <category>{x['category']}</category>")
+    if x['enclosure']:
+        # 画像サイズは取得しないので length は 0 とする
+        lines.append(f"      <enclosure url={quoteattr(prepared['raw']['enclosure'])} length=\"0\" type=\"{prepared['enclosure_type']}\"/>")
+    if prepared['date']:
+        lines.append(f"      <pubDate>{format_datetime(prepared['date'])}</pubDate>")
+    elif x['pubDate']:
+        # 解釈できない表記はそのまま出す
+        lines.append(f"      <pubDate>{x['pubDate']}</pubDate>")
+    lines.append('    </item>')
+    return '\n'.join(lines)
+
+
+def _atom_entry(prepared):
+    x = prepared['xml']
+    lines = ['  <entry>',
+             f"    <title>{x['title']}</title>",
+             f"    <link href={quoteattr(prepared['raw']['link'])}/>",
+             f"    <id>{x['link']}</id>",
+             f"    <updated>{prepared['published'] or FALLBACK_UPDATED}</updated>"]
+    if x['description']:
+        lines.append(f"    <summary>{x['description']}</summary>")
+    if x['category']:
+        lines.append(f"    <category term={quoteattr(prepared['raw']['category'])}/>")
+    if x['enclosure']:
+        lines.append(f"    <link rel=\"enclosure\" href={quoteattr(prepared['raw']['enclosure'])} type=\"{prepared['enclosure_type']}\"/>")
+    lines.append('  </entry>')
+    return '\n'.join(lines)
+
+
+def _json_item(prepared):
+    raw = prepared['raw']
+    entry = {'id': raw['link'], 'url': raw['link'], 'title': raw['title']}
+    if raw['description']:
+        entry['content_text'] = raw['description']
+    if prepared['published']:
+        entry['date_published'] = prepared['published']
+    if raw['category']:
+        entry['tags'] = [raw['category']]
+    if raw['enclosure']:
+        entry['image'] = raw['enclosure']
+    return json.dumps(entry, ensure_ascii=False)
+
+
+def render_feeds(channel, items, atom_id):
+    """チャンネル情報とアイテム列から全フォーマットのバイト列を作る（アイテムは1回だけ走査）"""
+    title = _clean(channel.get('title'))
+    author = _clean(channel.get('author')) or title
+    description = _clean(channel.get('description'))
+    link = _clean(channel.get('link'))
+
+    rss_items = []
+    atom_entries = []
+    json_items = []
+    latest = None
+    for item_data in items:
+        prepared = _prepare(item_data)
+        rss_items.append(_rss_item(prepared))
+        atom_entries.append(_atom_entry(prepared))
+        json_items.append(_json_item(prepared))
+        if prepared['date'] and (latest is None or prepared['date'] > latest):
+            latest = prepared['date']
+
+    # RSS 2.0
+    rss_head = ["<?xml version='1.0' encoding='utf-8'?>",
+                '<rss version="2.0">',
+                '  <channel>',
+                f'    <title>{escape(title)}</title>',
+                f'    <description>{escape(description)}</description>']
+    if link:
+        rss_head.append(f'    <link>{escape(link)}</link>')
+    rss = '\n'.join(rss_head + rss_items + ['  </channel>', '</rss>', ''])
+
+    # Atom
+    atom_head = ["<?xml version='1.0' encoding='utf-8'?>",
+                 '<feed xmlns="http://www.w3.org/2005/Atom">',
+                 f'  <title>{escape(title)}</title>',
+                 f'  <subtitle>{escape(description)}</subtitle>',
+                 f'  <id>{escape(atom_id)}</id>',
+                 f"  <updated>{latest.isoformat() if latest else FALLBACK_UPDATED}</updated>",
+                 f'  <author><name>{escape(author)}</name></author>']
+    if link:
+        atom_head.append(f'  <link href={quoteattr(link)}/>')
+    atom = '\n'.join(atom_head + atom_entries + ['</feed>', ''])
+
+    # JSON Feed 1.1
+    json_head = {'version': 'https://jsonfeed.org/version/1.1', 'title': title, 'description': description,
+                 'authors': [{'name': author}]}
+    if link:
+        json_head['home_page_url'] = link
+    head = json.dumps(json_head, ensure_ascii=False)[:-1]
+    json_feed = head + ', "items": [\n' + ',\n'.join(json_items) + '\n]}\n'
+
+    rendered = {}
+    for name, text in (('rss', rss), ('atom', atom), ('json', json_feed)):
+        data = text.encode('utf-8')
+        rendered[name] = data
+        # mtime=0 で同じ内容なら同じバイト列になるようにする
+        rendered[name + '.gz'] = gzip.compress(data, mtime=0)
+    return rendered
+
+
+def write_feeds(xml_file, channel, items):
+    """全フォーマットの書き込みを予約し、内容が変わったパスを返す"""
+    paths = output_paths(xml_file)
+    rendered = render_feeds(channel, items, feed_id(xml_file))
+    return [paths[name] for name, data in rendered.items() if stage(paths[name], data)]
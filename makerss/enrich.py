@@ -0,0 +1,113 @@
+"""個別ページから概要・画像を取得してアイテムを補完する（記事IDごとにキャッシュ）"""
+import html
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from urllib.parse import urljoin
+
+import requests
+
+from makerss.article_cache import load_cache, save_cache
+from makerss.registry import ROOT
+
+MAX_WORKERS = 4  # 個別ページ取得の同時接続数
+MAX_ATTEMPTS = 3  # 取得に失敗した記事を試す回数の上限（超えたら諦めて取り直さない）
+SUMMARY_LENGTH = 200  # descriptionに入れる本文の最大文字数
+BODY_SCAN_LENGTH = 20000  # 本文開始位置から概要・画像を探す範囲（文字数）
+
+TAG_PATTERN = re.compile(r'<[^>]+>')
+SCRIPT_PATTERN = re.compile(r'<(script|style)[^>]*>[\s\S]*?</\1>')
+IMG_PATTERN = re.compile(r'<img[^>]+src="([^"]+)"')
+
+
+def extract_article_id(url):
+    """URLから記事IDを抽出（imaパラメータを無視）"""
+    # /diary/detail/104021 の 104021 を取得
+    match = re.search(r'/diary/detail/(\d+)', url)
+    if match:
+        return match.group(1)
+    return url  # マッチしない場合はURL全体を返す
+
+
+def parse_body(html_content, body_marker, base_url):
+    """本文開始タグ以降から概要テキストと最初の画像URLを取り出す"""
+    start = html_content.find(body_marker)
+    if start < 0:
+        return None
+    body = html_content[start + len(body_marker):start + len(body_marker) + BODY_SCAN_LENGTH]
+
+    text = TAG_PATTERN.sub(' ', SCRIPT_PATTERN.sub(' ', body))
+    text = ' '.join(html.unescape(text).split())
+    if len(text) > SUMMARY_LENGTH:
+        text = text[:SUMMARY_LENGTH] + '...'
+
+    image_match = IMG_PATTERN.search(body)
+    image = urljoin(base_url, html.unescape(image_match.group(1))) if image_match else ''
+    return {'description': text, 'enclosure': image}
+
+
+def _fetch_detail(link, parse_detail):
+    response = requests.get(link, timeout=30)
+    response.raise_for_status()
+    return parse_detail(response.text, link)
+
+
+def _needs_fetch(entry):
+    """キャッシュの値から、個別ページを（再）取得すべきかを判定する"""
+    return entry is None or 0 < entry.get('failures', 0) < MAX_ATTEMPTS
+
+
+def enrich_items(new_items, items, cache, parse_detail, max_workers=MAX_WORKERS):
+    """新規アイテムと、失敗回数が上限未満の記事だけ個別ページを並列取得し、取得件数を返す
+
+    取得済みの記事はキャッシュを使う。失敗した記事は回数を記録し、MAX_ATTEMPTS 回で諦める。
+    """
+    targets = {}
+    for item in new_items:
+        article_id = extract_article_id(item['link'])
+        if _needs_fetch(cache.get(article_id)):
+            targets.setdefault(article_id, item['link'])
+    for item in items:
+        article_id = extract_article_id(item['link'])
+        if article_id in cache and _needs_fetch(cache[article_id]):
+            targets.setdefault(article_id, item['link'])
+    if not targets:
+        return 0
+
+    fetched = 0
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {executor.submit(_fetch_detail, link, parse_detail): article_id for article_id, link in targets.items()}
+        for future in as_completed(futures):
+            article_id = futures[future]
+            try:
+                detail = future.result()
+            except Exception as e:
+                print(f"個別ページ取得失敗: {targets[article_id]} ({e})")
+                cache[article_id] = {'failures': cache.get(article_id, {}).get('failures', 0) + 1}
+                continue
+            # 本文が見つからなかった記事も空で記録し、他のフィードから再取得しない
+            cache[article_id] = detail or {}
+            fetched += 1
+    return fetched
+
+
+def apply_cache(items, cache):
+    """キャッシュ済みの概要・画像をアイテムに付けたリストを返す（失敗の記録は付けない）"""
+    enriched = []
+    for item in items:
+        detail = cache.get(extract_article_id(item['link']))
+        enriched.append(dict(item, **detail) if detail and 'failures' not in detail else item)
+    return enriched
+
+
+def enrich_feed_items(feed, new_items, items, parse_detail):
+    """feeds.json の enrich 設定に従い、新規アイテムの個別ページを取得して出力アイテムに付ける"""
+    settings = feed['enrich']
+    cache_file = os.path.join(ROOT, settings['cache'])
+    cache = load_cache(cache_file)
+    before = dict(cache)
+    fetched = enrich_items(new_items, items, cache, parse_detail, settings.get('max_workers', MAX_WORKERS))
+    if cache != before:
+        save_cache(cache_file, cache)
+    print(f"{feed['name']}: 個別ページ取得 {fetched} items")
+    return apply_cache(items, cache)
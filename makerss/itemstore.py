@@ -0,0 +1,199 @@
+"""フィードのCSV（取り込み済みアイテムの記録）と、フィード間で共有するアイテムストア
+
+feeds.json で "store" を指定したフィード（同じ記事を複数のフィードが載せるもの）は、
+アイテム本体を items/<store>.csv に一度だけ保存し、フィードのCSVには参照だけを残す。
+ストアは取得元ごとに分けるので、同じリンクでも取得元が違えば別のアイテムになる。
+"store" のないフィードは従来どおりフィードのCSVに本体を1行ずつ書く。
+どちらも追記のみで、追加分だけがgitの差分になる。
+"""
+import csv
+import hashlib
+import io
+import os
+import re
+from collections import deque
+from urllib.parse import parse_qsl, urlencode, urlparse
+
+from makerss.registry import ROOT, output_path
+from makerss.transaction import on_rollback, read_bytes, read_text, stage
+
+STORE_DIR = os.path.join(ROOT, 'items')
+REF_FIELDNAMES = ['ref']  # ストアを使うフィードのCSVに残すのは参照だけ
+REF_LENGTH = 16  # 参照に使うSHA-1の桁数（64bit）
+VOLATILE_PARAMS = {'ima'}  # アクセスごとに変わり、記事の同一性に関係しないクエリ
+
+_stores = {}  # ストアのパス -> {'fieldnames': 列名, 'items': {参照: 本体}}（読み込み済みのもの）
+
+# 取り消したフィードの本体が残らないよう、rollback時は予約内容から読み直させる
+on_rollback(_stores.clear)
+
+
+def item_key(link):
+    """リンクを正規化してアイテムのキーにする（スキームと可変クエリを除く）"""
+    parsed = urlparse(link)
+    # ブログ記事は /diary/detail/104021 の記事IDだけで同一とみなす
+    match = re.search(r'/diary/detail/(\d+)', parsed.path)
+    if match:
+        return f"{parsed.netloc}/diary/detail/{match.group(1)}"
+    query = sorted((name, value) for name, value in parse_qsl(parsed.query) if name not in VOLATILE_PARAMS)
+    key = parsed.netloc + parsed.path
+    if query:
+        key += '?' + urlencode(query)
+    return key
+
+
+def row_key(row):
+    """CSV行・アイテムのキー（リンクだけで決まる標準の求め方）"""
+    return item_key(row['link'])
+
+
+def item_ref(key):
+    """キーから重複チェック・ストア参照に使う短い参照を作る"""
+    return hashlib.sha1(key.encode('utf-8')).hexdigest()[:REF_LENGTH]
+
+
+def link_ref(link):
+    """リンクから直接参照を求める（重複チェック用）"""
+    return item_ref(item_key(link))
+
+
+def store_path(name):
+    return os.path.join(STORE_DIR, name + '.csv')
+
+
+def _read_csv(csv_file):
+    """CSVを（未反映の書き込みも含めて）読む。存在しなければNone。足りない列は空文字にする"""
+    text = read_text(csv_file, 'utf-8-sig')
+    return None if text is None else csv.DictReader(io.StringIO(text, newline=''), restval='')
+
+
+def _csv_bytes(rows, fieldnames, header):
+    buffer = io.StringIO(newline='')
+    writer = csv.DictWriter(buffer, fieldnames=fieldnames, restval='', extrasaction='ignore')
+    if header:
+        writer.writeheader()
+    writer.writerows(rows)
+    # 既存CSVと同じくBOM付きUTF-8（BOMはファイル先頭にだけ付ける）
+    return buffer.getvalue().encode('utf-8-sig' if header else 'utf-8')
+
+
+def _append_csv(csv_file, rows, fieldnames):
+    """CSV末尾への行の追記を予約する（ファイルがなければ見出し付きで作る）"""
+    current = read_bytes(csv_file)
+    if current:
+        if not current.endswith(b'\n'):
+            current += b'\r\n'
+        stage(csv_file, current + _csv_bytes(rows, fieldnames, header=False))
+    else:
+        stage(csv_file, _csv_bytes(rows, fieldnames, header=True))
+
+
+def _fill(row, fieldnames):
+    """すべての列を持つアイテムにする（空の列も空文字で残す）"""
+    return {field: row.get(field) or '' for field in fieldnames}
+
+
+def _load_store(path):
+    if path not in _stores:
+        reader = _read_csv(path)
+        fieldnames = []
+        items = {}
+        if reader is not None:
+            fieldnames = [field for field in reader.fieldnames if field != 'ref']
+            for row in reader:
+                items[row.pop('ref')] = row
+        _stores[path] = {'fieldnames': fieldnames, 'items': items}
+    return _stores[path]
+
+
+def put_items(path, bodies, fieldnames):
+    """参照 -> 本体 をストアに追記する（既にある参照は書かない）。新しく登録した件数を返す"""
+    store = _load_store(path)
+    rows = []
+    for ref, body in bodies.items():
+        if ref in store['items']:
+            continue
+        body = _fill(body, fieldnames)
+        store['items'][ref] = body
+        rows.append(dict(body, ref=ref))
+    if not rows:
+        return 0
+
+    added = [field for field in fieldnames if field not in store['fieldnames']]
+    header = ['ref'] + store['fieldnames'] + added
+    current = read_bytes(path)
+    if current and added:
+        # 列が増えたら見出し行だけ書き換える（既存行は足りない列を空として読む）
+        stage(path, _csv_bytes([], header, header=True) + current.partition(b'\n')[2])
+    store['fieldnames'] = header[1:]
+    _append_csv(path, rows, header)
+    return len(rows)
+
+
+def get_item(path, ref, fieldnames):
+    """ストアから本体を取り出す（fieldnames の列はすべて埋めて返す）"""
+    return _fill(_load_store(path)['items'][ref], fieldnames)
+
+
+def merge_store(src_dir):
+    """別のワーカーが書いた items/ をこのストアに取り込む（本体は不変なので参照ごとの和集合でよい）"""
+    for file_name in sorted(os.listdir(src_dir)):
+        if not file_name.endswith('.csv'):
+            continue
+        # 取り込み元はリポジトリ外の成果物なので直接読む
+        with open(os.path.join(src_dir, file_name), 'r', encoding='utf-8-sig', newline='') as f:
+            reader = csv.DictReader(f, restval='')
+            fieldnames = [field for field in reader.fieldnames if field != 'ref']
+            bodies = {row.pop('ref'): row for row in reader}
+        put_items(os.path.join(STORE_DIR, file_name), bodies, fieldnames)
+
+
+def migrate_csv(feed, fieldnames, key_func=row_key):
+    """ストアを使うフィードの、本体を持つCSVをストアへの登録と参照だけのCSVに置き換える"""
+    csv_file = output_path(feed, 'csv')
+    reader = _read_csv(csv_file)
+    if reader is None or reader.fieldnames == REF_FIELDNAMES:
+        return
+    bodies = {item_ref(key_func(row)): row for row in reader}
+    put_items(store_path(feed['store']), bodies, fieldnames)
+    stage(csv_file, _csv_bytes([{'ref': ref} for ref in bodies], REF_FIELDNAMES, header=True))
+    print(f"{csv_file}: ストア形式に移行 {len(bodies)} items")
+
+
+def load_feed_refs(feed, fieldnames, key_func=row_key):
+    """フィードCSVから取り込み済みアイテムの参照を読み込む（重複チェック用）"""
+    if feed.get('store'):
+        migrate_csv(feed, fieldnames, key_func)
+    reader = _read_csv(output_path(feed, 'csv'))
+    if reader is None:
+        return set()
+    if feed.get('store'):
+        return {row['ref'] for row in reader}
+    return {item_ref(key_func(row)) for row in reader}
+
+
+def append_feed_items(feed, items, fieldnames, key_func=row_key):
+    """新規アイテムをフィードCSV末尾に追記する（ストアを使うフィードは本体をストアへ、CSVには参照だけ）"""
+    if not items:
+        return
+    csv_file = output_path(feed, 'csv')
+    if not feed.get('store'):
+        _append_csv(csv_file, items, fieldnames)
+        return
+
+    bodies = {item_ref(key_func(item)): item for item in items}
+    stored = put_items(store_path(feed['store']), bodies, fieldnames)
+    _append_csv(csv_file, [{'ref': ref} for ref in bodies], REF_FIELDNAMES)
+    print(f"{csv_file}: ストア新規 {stored} / 参照追加 {len(bodies)} items")
+
+
+def read_feed_items(feed, fieldnames, n):
+    """フィードCSV末尾N件を返す（最新が先頭、fieldnames の列はすべて埋める）"""
+    reader = _read_csv(output_path(feed, 'csv'))
+    if reader is None:
+        return []
+    last_n = deque(reader, maxlen=n)
+    if not feed.get('store'):
+        return [_fill(row, fieldnames) for row in reversed(last_n)]
+    path = store_path(feed['store'])
+    return [get_item(path, row['ref'], fieldnames) for row in reversed(last_n)]
@@ -0,0 +1,16 @@
+"""重い依存モジュールを必要になった時点でimportし、かかった時間を記録する"""
+import importlib
+import sys
+import time
+
+IMPORT_TIMES = {}  # モジュール名 -> import秒数（初回importのみ）
+
+
+def timed_import(name):
+    """モジュールをimportして返す（初回だけ所要時間をIMPORT_TIMESに記録）"""
+    if name in sys.modules:
+        return sys.modules[name]
+    started = time.perf_counter()
+    module = importlib.import_module(name)
+    IMPORT_TIMES[name] = time.perf_counter() - started
+    return module
@@ -0,0 +1,72 @@
+"""feeds.json（フィード定義）の読み込みとワーカー間のシャーディング"""
+import hashlib
+import json
+import os
+import sys
+
+from makerss.lazy import timed_import
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+REGISTRY_FILE = os.path.join(ROOT, 'feeds.json')
+REQUIRED_KEYS = ['name', 'extractor', 'source', 'channel', 'outputs']
+
+
+def load_registry(path=REGISTRY_FILE):
+    """フィード定義を読み込み、必須キーと名前の重複をチェックする"""
+    with open(path, 'r', encoding='utf-8') as f:
+        feeds = json.load(f)['feeds']
+
+    names = set()
+    store_extractors = {}
+    for feed in feeds:
+        missing = [key for key in REQUIRED_KEYS if key not in feed]
+        if missing:
+            raise ValueError(f"{feed.get('name', '?')}: 必須キーがありません {missing}")
+        if feed['name'] in names:
+            raise ValueError(f"{feed['name']}: フィード名が重複しています")
+        names.add(feed['name'])
+        # ストアのキーはリンクだけなので、1つのストアには同じ取得元のフィードだけを入れる
+        if feed.get('store') and store_extractors.setdefault(feed['store'], feed['extractor']) != feed['extractor']:
+            raise ValueError(f"{feed['name']}: ストア {feed['store']} は {store_extractors[feed['store']]} 専用です")
+        feed.setdefault('params', {})
+        feed.setdefault('filters', {})
+    return feeds
+
+
+def feeds_for(extractor, path=REGISTRY_FILE):
+    """指定した抽出モジュールを使うフィードだけを返す（各スクリプト単体実行用）"""
+    return [feed for feed in load_registry(path) if feed['extractor'] == extractor]
+
+
+def shard_group(feed):
+    """シャード分けの単位。アイテムストア・個別ページキャッシュを共有するフィードは同じシャードにまとめる"""
+    if feed.get('store'):
+        return 'store:' + feed['store']
+    if feed.get('enrich'):
+        return feed['enrich']['cache']
+    return feed['name']
+
+
+def shard_of(feed, count):
+    """シャード単位の安定ハッシュからシャード番号を決める（実行環境によらず同じ結果）"""
+    digest = hashlib.sha1(shard_group(feed).encode('utf-8')).hexdigest()
+    return int(digest, 16) % count
+
+
+def select_shard(feeds, index, count):
+    """index番目のシャードに属するフィードだけを返す"""
+    if not 0 <= index < count:
+        raise ValueError(f"シャード指定が不正です: {index}/{count}")
+    return [feed for feed in feeds if shard_of(feed, count) == index]
+
+
+def output_path(feed, kind):
+    """outputsの相対パスをリポジトリルート基準の絶対パスにする"""
+    return os.path.join(ROOT, feed['outputs'][kind])
+
+
+def load_extractor(feed):
+    """フィードの抽出モジュールを必要になった時点でimportする"""
+    if ROOT not in sys.path:
+        sys.path.insert(0, ROOT)
+    return timed_import(feed['extractor'])
@@ -0,0 +1,40 @@
+"""feeds.json のフィードを順に実行するランナー（コマンドラインは makerss.cli）"""
+import argparse
+import time
+import traceback
+
+from makerss.registry import load_extractor
+from makerss.transaction import commit_outputs, rollback, savepoint
+
+
+def parse_shard(value):
+    """'K/N' 形式のシャード指定を (K, N) に変換する"""
+    try:
+        index, count = (int(part) for part in value.split('/'))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"K/N 形式で指定してください: {value}")
+    if count < 1 or not 0 <= index < count:
+        raise argparse.ArgumentTypeError(f"シャード指定が不正です: {value}")
+    return index, count
+
+
+def run_feeds(feeds, run_feed=None):
+    """フィードを順に実行し、失敗したフィード名のリストを返す（1件の失敗で他を止めない）
+
+    出力は全フィード分をまとめて最後に反映する。失敗したフィードの書き込みは取り消す。
+    run_feed を渡さなければフィードごとに extractor の run_feed を使う（スクリプト単体実行では自分の関数を渡す）。
+    """
+    failed = []
+    for feed in feeds:
+        started = time.perf_counter()
+        point = savepoint()
+        try:
+            (run_feed or load_extractor(feed).run_feed)(feed)
+        except Exception:
+            rollback(point)
+            print(f"{feed['name']}: 失敗")
+            traceback.print_exc()
+            failed.append(feed['name'])
+        print(f"{feed['name']}: {time.perf_counter() - started:.2f}s")
+    commit_outputs()
+    return failed
@@ -0,0 +1,129 @@
+"""CSV・アイテムストア・フィード出力の書き込みを実行の最後にまとめて反映する
+
+書き込みはいったんメモリに貯め（stage）、commit_outputs() で一時ファイルに書いてから
+fsyncをまとめて行い、os.replace で置き換える。内容のハッシュが既存ファイルと同じものは書かない。
+途中で落ちても、既存ファイルは置き換え前の完全な内容のまま残る。
+"""
+import hashlib
+import os
+
+TEMP_SUFFIX = '.tmp'
+
+_pending = {}  # パス -> 書き込む内容（bytes）
+_unchanged = set()  # 内容が同じで書き込みを省いたパス
+_rollback_hooks = []  # rollback() で呼ぶ関数（予約内容から作ったキャッシュを捨てる）
+
+
+def _digest(data):
+    return hashlib.sha256(data).digest()
+
+
+def read_bytes(path):
+    """未反映の内容があればそれを、なければファイルの内容を返す（存在しなければNone）"""
+    if path in _pending:
+        return _pending[path]
+    if not os.path.exists(path):
+        return None
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+def read_text(path, encoding='utf-8'):
+    data = read_bytes(path)
+    return None if data is None else data.decode(encoding)
+
+
+def stage(path, data):
+    """書き込みを予約する。既存ファイルと同じ内容なら予約せずFalseを返す"""
+    current = None
+    if os.path.exists(path):
+        with open(path, 'rb') as f:
+            current = f.read()
+    if current is not None and _digest(current) == _digest(data):
+        _pending.pop(path, None)
+        _unchanged.add(path)
+        return False
+    _pending[path] = data
+    _unchanged.discard(path)
+    return True
+
+
+def on_rollback(hook):
+    """rollback() のときに呼ぶ関数を登録する（予約内容を読み込んだキャッシュを持つモジュール用）"""
+    _rollback_hooks.append(hook)
+
+
+def savepoint():
+    """現在の予約状態を控える（フィード単位の取り消し用）"""
+    return dict(_pending), set(_unchanged)
+
+
+def rollback(point):
+    """savepoint() 以降の予約を取り消し、登録されたキャッシュも捨てる"""
+    pending, unchanged = point
+    _pending.clear()
+    _pending.update(pending)
+    _unchanged.clear()
+    _unchanged.update(unchanged)
+    for hook in _rollback_hooks:
+        hook()
+
+
+def commit_outputs():
+    """予約した書き込みをすべて反映し、書き込んだファイル数を返す"""
+    if not _pending:
+        print(f"出力: 書き込みなし（変更なし {len(_unchanged)} files）")
+        _unchanged.clear()
+        return 0
+
+    # CSVは「取り込み済み」の記録なので最後に置き換える。
+    # 途中で落ちてもCSVが古いままなら、次回同じアイテムを取り直して整合する
+    paths = sorted(_pending, key=lambda path: (path.endswith('.csv'), path))
+
+    temp_files = []
+    try:
+        for path in paths:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            temp_path = path + TEMP_SUFFIX
+            with open(temp_path, 'wb') as f:
+                f.write(_pending[path])
+            temp_files.append(temp_path)
+
+        # fsyncはファイルごとに書き込み直後ではなく、全ファイルを書いてからまとめて行う
+        for temp_path in temp_files:
+            fd = os.open(temp_path, os.O_RDONLY)
+            try:
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+    except BaseException:
+        for temp_path in temp_files:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+        raise
+
+    for path in paths:
+        os.replace(path + TEMP_SUFFIX, path)
+
+    # ディレクトリのエントリ（renameの結果）もディレクトリごとに1回だけfsyncする
+    for directory in sorted({os.path.dirname(path) for path in paths}):
+        _fsync_dir(directory)
+
+    count = len(paths)
+    print(f"出力: {count} files 書き込み（変更なし {len(_unchanged)} files）")
+    _pending.clear()
+    _unchanged.clear()
+    return count
+
+
+def _fsync_dir(directory):
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return  # ディレクトリをopenできない環境（Windowsなど）では省略
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
@@ -0,0 +1,39 @@
+import json
+import os
+
+import pytest
+
+from makerss import cli, itemstore, transaction
+
+
+@pytest.fixture(autouse=True)
+def repo_root(tmp_path, monkeypatch):
+    root = tmp_path / 'repo'
+    monkeypatch.setattr(cli, 'ROOT', str(root))
+    monkeypatch.setattr(itemstore, 'STORE_DIR', str(root / 'items'))
+    monkeypatch.setattr(transaction, '_pending', {})
+    monkeypatch.setattr(transaction, '_unchanged', set())
+    itemstore._stores.clear()
+    yield root
+    itemstore._stores.clear()
+
+
+def write(path, text):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text, encoding='utf-8')
+
+
+def test_merge_stages_files_and_unions_caches(tmp_path, repo_root, capsys):
+    write(repo_root / 'makeRSS_NB' / 'feed.xml', 'same')
+    for shard, article_id in (('outputs-0', '1'), ('outputs-1', '2')):
+        write(tmp_path / shard / 'makeRSS_NB' / 'article_cache.json', json.dumps({article_id: {'description': article_id}}))
+        write(tmp_path / shard / 'makeRSS_NB' / 'feed.xml', 'same')
+    write(tmp_path / 'outputs-1' / 'makeRSS_NB' / 'new.xml', 'new')
+
+    assert cli.main(['merge', str(tmp_path / 'outputs-0'), str(tmp_path / 'outputs-1')]) == 0
+
+    with open(repo_root / 'makeRSS_NB' / 'article_cache.json', encoding='utf-8') as f:
+        assert json.load(f) == {'1': {'description': '1'}, '2': {'description': '2'}}
+    assert (repo_root / 'makeRSS_NB' / 'new.xml').read_text() == 'new'
+    assert not any(name.endswith('.tmp') for name in os.listdir(repo_root / 'makeRSS_NB'))
+    assert '出力: 2 files 書き込み（変更なし 1 files）' in capsys.readouterr().out
@@ -0,0 +1,61 @@
+import gzip
+import json
+import xml.etree.ElementTree as ET
+
+from makerss.emitter import output_paths, render_feeds
+
+ATOM = '{http://www.w3.org/2005/Atom}'
+CHANNEL = {'title': 'Latest Blogs', 'description': 'Blog Posts', 'link': 'https://example.com/'}
+ITEMS = [
+    {'title': 'A & B <b>', 'link': 'https://example.com/1?a=1&b=2', 'description': 'body\x0b', 'pubDate': '2025.12.31 20:31',
+     'enclosure': 'https://example.com/1.png'},
+    {'title': 'no date', 'link': 'https://example.com/2', 'pubDate': '近日公開'},
+]
+
+
+def render():
+    return render_feeds(CHANNEL, ITEMS, 'tag:example.com,2024:feed')
+
+
+def test_all_formats_parse():
+    rendered = render()
+
+    rss = ET.fromstring(rendered['rss'])
+    items = rss.findall('channel/item')
+    assert [item.findtext('title') for item in items] == ['A & B <b>', 'no date']
+    assert items[0].findtext('link') == 'https://example.com/1?a=1&b=2'
+    assert items[0].findtext('description') == 'body'  # 制御文字は除く
+    assert items[0].find('enclosure').get('type') == 'image/png'
+
+    atom = ET.fromstring(rendered['atom'])
+    assert atom.findtext(ATOM + 'id') == 'tag:example.com,2024:feed'
+    assert atom.findtext(ATOM + 'author/' + ATOM + 'name') == 'Latest Blogs'
+    assert [entry.findtext(ATOM + 'updated') for entry in atom.findall(ATOM + 'entry')] == [
+        '2025-12-31T20:31:00+09:00', '1970-01-01T00:00:00+00:00']
+
+    feed = json.loads(rendered['json'])
+    assert feed['version'] == 'https://jsonfeed.org/version/1.1'
+    assert [item['id'] for item in feed['items']] == ['https://example.com/1?a=1&b=2', 'https://example.com/2']
+    assert feed['items'][0]['date_published'] == '2025-12-31T20:31:00+09:00'
+    assert 'date_published' not in feed['items'][1]
+
+
+def test_rfc822_pub_date_only_when_parsed():
+    items = ET.fromstring(render()['rss']).findall('channel/item')
+    assert items[0].findtext('pubDate') == 'Wed, 31 Dec 2025 20:31:00 +0900'
+    assert items[1].findtext('pubDate') == '近日公開'  # 解釈できない表記はそのまま
+
+
+def test_gzip_is_deterministic():
+    first = render()
+    second = render()
+    for name in ('rss', 'atom', 'json'):
+        assert first[name + '.gz'] == second[name + '.gz']
+        assert first[name + '.gz'] == gzip.compress(first[name], mtime=0)
+        assert gzip.decompress(first[name + '.gz']) == first[name]
+
+
+def test_output_paths():
+    assert output_paths('feeds/a.xml') == {
+        'rss': 'feeds/a.xml', 'rss.gz': 'feeds/a.xml.gz', 'atom': 'feeds/a.atom', 'atom.gz': 'feeds/a.atom.gz',
+        'json': 'feeds/a.json', 'json.gz': 'feeds/a.json.gz'}
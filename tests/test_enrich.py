@@ -0,0 +1,61 @@
+import json
+
+import pytest
+
+from makerss import article_cache, enrich, transaction
+
+
+@pytest.fixture(autouse=True)
+def clean_transaction(monkeypatch):
+    monkeypatch.setattr(transaction, '_pending', {})
+    monkeypatch.setattr(transaction, '_unchanged', set())
+
+
+def post(article_id):
+    return {'title': str(article_id), 'link': f'https://www.hinatazaka46.com/s/official/diary/detail/{article_id}?ima=0000'}
+
+
+def test_fetches_only_new_items(monkeypatch):
+    fetched = []
+
+    def fetch_detail(link, parse_detail):
+        fetched.append(link)
+        return {'description': 'body', 'enclosure': ''}
+
+    monkeypatch.setattr(enrich, '_fetch_detail', fetch_detail)
+    cache = {}
+    items = [post(i) for i in range(300)]
+    assert enrich.enrich_items(items[:1], items, cache, None) == 1
+    assert fetched == [items[0]['link']]
+    assert enrich.apply_cache(items[:2], cache) == [dict(items[0], description='body', enclosure=''), items[1]]
+
+
+def test_failed_fetch_is_retried_up_to_limit(monkeypatch):
+    attempts = []
+
+    def fetch_detail(link, parse_detail):
+        attempts.append(link)
+        raise OSError('404')
+
+    monkeypatch.setattr(enrich, '_fetch_detail', fetch_detail)
+    cache = {}
+    items = [post(1)]
+    enrich.enrich_items(items, items, cache, None)
+    for _ in range(enrich.MAX_ATTEMPTS + 2):
+        enrich.enrich_items([], items, cache, None)
+
+    assert len(attempts) == enrich.MAX_ATTEMPTS
+    assert cache == {'1': {'failures': enrich.MAX_ATTEMPTS}}
+    assert enrich.apply_cache(items, cache) == items
+
+
+def test_merge_cache_prefers_successful_fetch(tmp_path):
+    cache_file = str(tmp_path / 'article_cache.json')
+    article_cache.save_cache(cache_file, {'1': {'failures': 2}, '2': {'description': 'kept'}, '3': {}})
+    src = tmp_path / 'incoming.json'
+    src.write_text(json.dumps({'1': {'description': 'ok'}, '2': {'failures': 1}, '3': {'description': 'found'}, '4': {}}))
+
+    article_cache.merge_cache(str(src), cache_file)
+
+    assert article_cache.load_cache(cache_file) == {
+        '1': {'description': 'ok'}, '2': {'description': 'kept'}, '3': {'description': 'found'}, '4': {}}
@@ -0,0 +1,90 @@
+import pytest
+
+from makerss import itemstore, transaction
+from makerss.emitter import render_feeds
+
+FIELDNAMES = ['pubDate', 'title', 'link', 'category', 'start_time']
+
+
+@pytest.fixture(autouse=True)
+def store_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(itemstore, 'STORE_DIR', str(tmp_path / 'items'))
+    monkeypatch.setattr(transaction, '_pending', {})
+    monkeypatch.setattr(transaction, '_unchanged', set())
+    itemstore._stores.clear()
+    yield
+    itemstore._stores.clear()
+
+
+def make_feed(tmp_path, name, store=None):
+    feed = {'name': name, 'outputs': {'csv': str(tmp_path / f'{name}.csv'), 'xml': str(tmp_path / f'{name}.xml')}}
+    if store:
+        feed['store'] = store
+    return feed
+
+
+def reload_from_disk():
+    transaction.commit_outputs()
+    itemstore._stores.clear()
+
+
+@pytest.mark.parametrize('store', ['schedule', None])
+def test_empty_fields_round_trip_and_render(tmp_path, store):
+    feed = make_feed(tmp_path, 'schedule_feed', store)
+    row = {'pubDate': '2026/03/27', 'title': '誕生日', 'link': 'https://example.com/s/1?ima=0001', 'category': '', 'start_time': ''}
+    itemstore.append_feed_items(feed, [row], FIELDNAMES)
+    reload_from_disk()
+
+    items = itemstore.read_feed_items(feed, FIELDNAMES, 10)
+    assert items == [row]
+    assert itemstore.load_feed_refs(feed, FIELDNAMES) == {itemstore.link_ref(row['link'])}
+
+    # Y_Sche と同じく開始時刻を description に入れて描画できる
+    feed_items = [dict(item_data, description=item_data['start_time']) for item_data in items]
+    rendered = render_feeds({'title': 'schedule'}, feed_items, 'tag:example.com,2024:schedule')
+    rss = rendered['rss'].decode('utf-8')
+    assert '      <title>誕生日</title>' in rss
+    assert '      <description>' not in rss  # 空の開始時刻は出力しない
+
+
+def test_store_shared_between_feeds(tmp_path):
+    first = make_feed(tmp_path, 'first', 'blog')
+    second = make_feed(tmp_path, 'second', 'blog')
+    row = {'title': 'a', 'link': 'https://example.com/diary/detail/1?ima=0000', 'pubDate': '2025.12.31 20:31'}
+    itemstore.append_feed_items(first, [row], ['title', 'link', 'pubDate'])
+    itemstore.append_feed_items(second, [dict(row, link='https://example.com/diary/detail/1?ima=0001')], ['title', 'link', 'pubDate'])
+    reload_from_disk()
+
+    with open(itemstore.store_path('blog'), encoding='utf-8-sig') as f:
+        assert len(f.read().splitlines()) == 2  # 見出しと本体1行
+    assert itemstore.read_feed_items(second, ['title', 'link', 'pubDate'], 10) == [row]
+
+
+def test_new_field_rewrites_only_header(tmp_path):
+    feed = make_feed(tmp_path, 'feed', 'news')
+    old = {'title': 'old', 'link': 'https://example.com/1'}
+    itemstore.append_feed_items(feed, [old], ['title', 'link'])
+    reload_from_disk()
+    new = {'title': 'new', 'link': 'https://example.com/2', 'description': 'body'}
+    itemstore.append_feed_items(feed, [new], ['title', 'link', 'description'])
+    reload_from_disk()
+
+    with open(itemstore.store_path('news'), encoding='utf-8-sig', newline='') as f:
+        lines = f.read().splitlines()
+    assert lines[0] == 'ref,title,link,description'
+    assert lines[1].endswith(',old,https://example.com/1')
+    assert itemstore.read_feed_items(feed, ['title', 'link', 'description'], 10) == [new, dict(old, description='')]
+
+
+def test_legacy_csv_is_migrated_into_store(tmp_path):
+    feed = make_feed(tmp_path, 'legacy', 'news')
+    with open(feed['outputs']['csv'], 'w', encoding='utf-8-sig', newline='') as f:
+        f.write('title,link,description,pubDate\r\nt,https://example.com/1,,2025-12-25T12:40:29+09:00\r\n')
+
+    refs = itemstore.load_feed_refs(feed, ['title', 'link', 'description', 'pubDate'])
+    reload_from_disk()
+
+    assert refs == {itemstore.link_ref('https://example.com/1')}
+    assert itemstore.read_feed_items(feed, ['title', 'link', 'description', 'pubDate'], 10) == [
+        {'title': 't', 'link': 'https://example.com/1', 'description': '', 'pubDate': '2025-12-25T12:40:29+09:00'}]
+
@@ -0,0 +1,53 @@
+import json
+
+import pytest
+
+from makerss.registry import REGISTRY_FILE, load_registry, select_shard, shard_group, shard_of
+
+
+def write_registry(tmp_path, feeds):
+    path = tmp_path / 'feeds.json'
+    path.write_text(json.dumps({'feeds': feeds}), encoding='utf-8')
+    return str(path)
+
+
+def feed(name, extractor='makeRSS_HB.makeRSS_HinataBlog', **extra):
+    return dict({'name': name, 'extractor': extractor, 'source': 'https://example.com/', 'channel': {}, 'outputs': {}}, **extra)
+
+
+def test_shard_is_stable():
+    # シャードはフィード名のSHA-1で決まる（Pythonのhash()のように実行ごとに変わらない）
+    assert [shard_of({'name': 'hatena_ai'}, count) for count in (2, 3, 4, 8)] == [0, 2, 0, 0]
+    assert [shard_of({'name': 'nogizaka_schedule_yumiki'}, count) for count in (2, 3, 4, 8)] == [0, 0, 2, 2]
+
+
+def test_feeds_sharing_store_or_cache_land_on_same_shard():
+    store_feeds = [feed(f'hinata_{i}', store='hinata', enrich={'cache': 'makeRSS_HB/article_cache.json'}) for i in range(5)]
+    cache_feeds = [feed(f'nogizaka_{i}', enrich={'cache': 'makeRSS_NB/article_cache.json'}) for i in range(5)]
+    assert {shard_group(f) for f in store_feeds} == {'store:hinata'}
+    assert shard_group(feed('hatena_ai')) == 'hatena_ai'
+    for count in range(1, 9):
+        assert len({shard_of(f, count) for f in store_feeds}) == 1
+        assert len({shard_of(f, count) for f in cache_feeds}) == 1
+
+
+def test_select_shard_partitions_registry():
+    feeds = load_registry(REGISTRY_FILE)
+    for count in (1, 2, 3):
+        shards = [select_shard(feeds, index, count) for index in range(count)]
+        assert sorted(f['name'] for shard in shards for f in shard) == sorted(f['name'] for f in feeds)
+    with pytest.raises(ValueError):
+        select_shard(feeds, 2, 2)
+
+
+def test_load_registry_rejects_store_shared_by_extractors(tmp_path):
+    path = write_registry(tmp_path, [feed('a', store='news'), feed('b', extractor='makeRSS_PRTIMES.makeRSS_PRTIMES', store='news')])
+    with pytest.raises(ValueError, match='ストア news'):
+        load_registry(path)
+
+
+def test_load_registry_defaults_and_duplicates(tmp_path):
+    loaded = load_registry(write_registry(tmp_path, [feed('a')]))
+    assert loaded[0]['params'] == {} and loaded[0]['filters'] == {}
+    with pytest.raises(ValueError, match='重複'):
+        load_registry(write_registry(tmp_path, [feed('a'), feed('a')]))
@@ -0,0 +1,44 @@
+import argparse
+
+import pytest
+
+from makerss import itemstore, transaction
+from makerss.runner import parse_shard, run_feeds
+
+
+@pytest.fixture(autouse=True)
+def store_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(itemstore, 'STORE_DIR', str(tmp_path / 'items'))
+    monkeypatch.setattr(transaction, '_pending', {})
+    monkeypatch.setattr(transaction, '_unchanged', set())
+    itemstore._stores.clear()
+    yield
+    itemstore._stores.clear()
+
+
+def make_feed(tmp_path, name):
+    return {'name': name, 'store': 'news', 'outputs': {'csv': str(tmp_path / f'{name}.csv')}}
+
+
+def test_parse_shard():
+    assert parse_shard('1/4') == (1, 4)
+    for value in ('4/4', '0/0', 'x', '1'):
+        with pytest.raises(argparse.ArgumentTypeError):
+            parse_shard(value)
+
+
+def test_failed_feed_is_rolled_back_and_others_committed(tmp_path):
+    good = make_feed(tmp_path, 'good')
+    bad = make_feed(tmp_path, 'bad')
+
+    # 同じ記事を両方のフィードが載せる。失敗したフィードの本体がストアのキャッシュに残ると、後のフィードで書き漏れる
+    def run_feed(feed):
+        itemstore.append_feed_items(feed, [{'title': 'shared', 'link': 'https://example.com/1'}], ['title', 'link'])
+        if feed is bad:
+            raise RuntimeError('fetch failed')
+
+    assert run_feeds([bad, good], run_feed) == ['bad']
+    itemstore._stores.clear()
+
+    assert not (tmp_path / 'bad.csv').exists()
+    assert itemstore.read_feed_items(good, ['title', 'link'], 10) == [{'title': 'shared', 'link': 'https://example.com/1'}]
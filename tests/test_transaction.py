@@ -0,0 +1,73 @@
+import os
+
+import pytest
+
+from makerss import transaction
+from makerss.transaction import commit_outputs, read_bytes, rollback, savepoint, stage
+
+
+@pytest.fixture(autouse=True)
+def clean_transaction(monkeypatch):
+    monkeypatch.setattr(transaction, '_pending', {})
+    monkeypatch.setattr(transaction, '_unchanged', set())
+    monkeypatch.setattr(transaction, '_rollback_hooks', [])
+
+
+def test_stage_skips_unchanged_content(tmp_path):
+    path = tmp_path / 'feed.xml'
+    path.write_bytes(b'same')
+    mtime = os.stat(path).st_mtime_ns
+
+    assert stage(str(path), b'same') is False
+    assert commit_outputs() == 0
+    assert os.stat(path).st_mtime_ns == mtime
+
+
+def test_commit_writes_staged_files_csv_last(tmp_path, monkeypatch):
+    replaced = []
+    real_replace = os.replace
+    monkeypatch.setattr(os, 'replace', lambda src, dst: (replaced.append(os.path.basename(dst)), real_replace(src, dst)))
+    stage(str(tmp_path / 'feed.csv'), b'csv')
+    stage(str(tmp_path / 'sub' / 'feed.xml'), b'xml')
+    assert read_bytes(str(tmp_path / 'feed.csv')) == b'csv'  # 未反映の予約も読める
+
+    assert commit_outputs() == 2
+    assert replaced == ['feed.xml', 'feed.csv']
+    assert (tmp_path / 'sub' / 'feed.xml').read_bytes() == b'xml'
+    assert not list(tmp_path.rglob('*.tmp'))
+
+
+def test_failed_commit_removes_temp_files_and_keeps_old_content(tmp_path, monkeypatch):
+    old = tmp_path / 'feed.xml'
+    old.write_bytes(b'old')
+    stage(str(old), b'new')
+    stage(str(tmp_path / 'feed.csv'), b'csv')
+
+    def fail(fd):
+        raise OSError('disk full')
+
+    monkeypatch.setattr(os, 'fsync', fail)
+    with pytest.raises(OSError):
+        commit_outputs()
+
+    assert old.read_bytes() == b'old'
+    assert not (tmp_path / 'feed.csv').exists()
+    assert not list(tmp_path.glob('*.tmp'))
+
+
+def test_rollback_restores_pending_unchanged_and_calls_hooks(tmp_path):
+    calls = []
+    transaction.on_rollback(lambda: calls.append('hook'))
+    kept = tmp_path / 'kept.xml'
+    kept.write_bytes(b'same')
+    stage(str(tmp_path / 'a.xml'), b'a')
+    point = savepoint()
+
+    stage(str(tmp_path / 'a.xml'), b'changed')
+    stage(str(tmp_path / 'b.xml'), b'b')
+    stage(str(kept), b'same')
+    rollback(point)
+
+    assert transaction._pending == {str(tmp_path / 'a.xml'): b'a'}
+    assert transaction._unchanged == set()
+    assert calls == ['hook']